@@ -2,7 +2,7 @@
 # IMPORTS #
 ###########
 
-import seaborn as sns   # will be used for some plots on the Sequencing Runs page
+import pandas as pd
 from shiny import App, render, ui, reactive
 import datetime 
 import pytz # For fixing timezone differences
@@ -12,12 +12,16 @@ from shinyswatch import theme
 # App modules
 from src.shinylims.ui_pages import projects_page, wgs_samples_page, prepared_samples_page, seq_page
 from src.shinylims.ui_server import setup_projects_page, setup_wgs_samples_page, setup_prepared_samples_page, setup_seq_run_page
-from src.shinylims.data_utils import fetch_pinned_data
+from src.shinylims.data_utils import fetch_pinned_data_as_completed
 
 # Add assets
 from pathlib import Path
 css_path = Path(__file__).parent / "assets" / "styles.css"
 
+# Copy-on-write lets the tables derived on each render (filtered rows, selected columns, reset indexes)
+# share memory with the pinned dataframes instead of copying them
+pd.set_option("mode.copy_on_write", True)
+
 ####################
 # CONSTRUCT THE UI #
 ####################
@@ -63,58 +67,71 @@ def server(input, output, session):
     function update_tooltip_output()
     '''
 
-    # Fetch initial data
-    with ui.Progress (min=1, max=12) as p:
+    # Fetch initial data. The pins are read concurrently since each fetch is mostly waiting on the network,
+    # and the progress bar advances as each pin arrives
+    with ui.Progress (min=0, max=8) as p:
         p.set(message="Loading datasets from pins...")
         
-        projects_df, project_date_created = fetch_pinned_data("vi2172/projects_limsshiny")
-        p.set(3, message="Projects data fetched")
-        wgs_df, wgs_date_created = fetch_pinned_data("vi2172/wgs_samples_limsshiny")
-        p.set(6, message="WGS samples data fetched")
-        prepared_df, prepared_date_created = fetch_pinned_data("vi2172/wgs_prepared_limsshiny")
-        p.set(7, message="Prepared data fetched")
-        seq_df, seq_date_created = fetch_pinned_data("vi2172/seq_runs_limsshiny")
-        p.set(8, message="Seq data fetched")
-        historical_df, historical_date_created = fetch_pinned_data("vi2172/wgs_historical")
-        p.set(9, message="Historical sample data fetched")
-        historical_seq_df, historical_seq_date_created = fetch_pinned_data("vi2172/wgs_historical_seqRuns")
-        p.set(10, message="Historical seq data fetched")
+        pinned_data = {}
+        for fetched, (pin_name, data) in enumerate(fetch_pinned_data_as_completed([
+            "vi2172/projects_limsshiny",
+            "vi2172/wgs_samples_limsshiny",
+            "vi2172/wgs_prepared_limsshiny",
+            "vi2172/seq_runs_limsshiny",
+            "vi2172/wgs_historical",
+            "vi2172/wgs_historical_seqRuns",
+        ]), start=1):
+            pinned_data[pin_name] = data
+            p.set(fetched, message=f"{pin_name} fetched")
+
+        projects_df, project_date_created = pinned_data["vi2172/projects_limsshiny"]
+        wgs_df, wgs_date_created = pinned_data["vi2172/wgs_samples_limsshiny"]
+        prepared_df, prepared_date_created = pinned_data["vi2172/wgs_prepared_limsshiny"]
+        seq_df, seq_date_created = pinned_data["vi2172/seq_runs_limsshiny"]
+        historical_df, historical_date_created = pinned_data["vi2172/wgs_historical"]
+        historical_seq_df, historical_seq_date_created = pinned_data["vi2172/wgs_historical_seqRuns"]
 
         # Initialize reactive values with the initial data
         projects_df = reactive.Value(projects_df)
         wgs_df = reactive.Value(wgs_df)
         prepared_df = reactive.Value(prepared_df)
         seq_df = reactive.Value(seq_df)
-        p.set(11, message="Reactive dataframe values established")
+        p.set(7, message="Reactive dataframe values established")
 
         projects_df_created = reactive.Value(project_date_created)
         wgs_date_created = reactive.Value(wgs_date_created)
         prepared_date_created = reactive.Value(prepared_date_created)
         seq_date_created = reactive.Value(seq_date_created)
-        p.set(12, message="Datasets loaded successfully")
+        p.set(8, message="Datasets loaded successfully")
     
     # Define a function to update the reactive values
     def update_pinned_data():
-        with ui.Progress (min=1, max=6) as p:
+        with ui.Progress (min=0, max=5) as p:
             p.set(message="Loading updated datasets from pins...")
 
-            updated_projects_df, updated_project_date_created = fetch_pinned_data("vi2172/projects_limsshiny")
-            p.set(3, message="Projects data fetched")
-            updated_wgs_df, updated_wgs_date_created = fetch_pinned_data("vi2172/wgs_samples_limsshiny")
-            p.set(6, message="WGS samples data fetched")
-            updated_prepared_df, updated_prepared_created = fetch_pinned_data("vi2172/wgs_prepared_limsshiny")
-            p.set(8, message="Prepared data fetched")
+            updated_data = {}
+            for fetched, (pin_name, data) in enumerate(fetch_pinned_data_as_completed([
+                "vi2172/projects_limsshiny",
+                "vi2172/wgs_samples_limsshiny",
+                "vi2172/wgs_prepared_limsshiny",
+            ], refresh=True), start=1):
+                updated_data[pin_name] = data
+                p.set(fetched, message=f"{pin_name} fetched")
+
+            updated_projects_df, updated_project_date_created = updated_data["vi2172/projects_limsshiny"]
+            updated_wgs_df, updated_wgs_date_created = updated_data["vi2172/wgs_samples_limsshiny"]
+            updated_prepared_df, updated_prepared_created = updated_data["vi2172/wgs_prepared_limsshiny"]
 
             # Update reactive values
             projects_df.set(updated_projects_df)
             wgs_df.set(updated_wgs_df)
             prepared_df.set(updated_prepared_df)
-            p.set(9, message="Reactive dataframe values updated")
+            p.set(4, message="Reactive dataframe values updated")
 
             projects_df_created.set(updated_project_date_created)
             wgs_date_created.set(updated_wgs_date_created)
             prepared_date_created.set(updated_prepared_created)
-            p.set(10, message="Datasets updated successfully")
+            p.set(5, message="Datasets updated successfully")
 
     # Define an effect to handle the update button click event
     @reactive.Effect
@@ -4,6 +4,13 @@ from shiny import ui
 import numpy as np
 from dotenv import load_dotenv
 import os
+import html
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+import logging
+
+logger = logging.getLogger(__name__)
 
 def transform_to_html(limsid):
     if pd.isna(limsid) or limsid == '':
@@ -21,26 +28,40 @@ def transform_to_html(limsid):
     return ', '.join(html_links)
 
 
-def transform_comments_to_html(comment):
-    if pd.isna(comment) or comment == '':
-        return comment
-    return comment.replace('\n', '<br>')
+def transform_to_html_column(limsid_column):
 
+    # Limsids are shared by all samples processed in the same step, so each distinct value is only transformed once
+    unique_limsids = limsid_column.unique()
+    return limsid_column.map(dict(zip(unique_limsids, map(transform_to_html, unique_limsids))))
 
-def custom_to_datetime(date_series):
-    try:
-        return pd.to_datetime(date_series, format='%y%m%d', errors='coerce')
-    except Exception as e:
-        print(f"Error converting dates: {e}")
-        return date_series
 
+@lru_cache(maxsize=1)
+def get_pins_board():
 
-def fetch_pinned_data(pin_name):
-    
     # Load environment variables from .env file
     load_dotenv()
+
+    # The board is shared by all pin fetches, so its requests session keeps connections to Posit Connect open
+    return board_connect(api_key=os.getenv('POSIT_API_KEY'), server_url=os.getenv('POSIT_SERVER_URL'))
+
+
+# Fetched pins are shared between sessions for a short while, as the pins are only updated every 2 hours.
+# The cached dataframes are shared, so they must not be modified in place by the server functions
+PIN_CACHE_SECONDS = 300
+pin_cache = {}
+
+# Columns that repeat a few distinct values over many rows (mostly the selectize filter columns)
+CATEGORY_COLUMNS = ["Project Account", "Experiment Name", "Experiment Name (history not shown)", "Progress", "Species", "Casette Type"]
+
+
+def fetch_pinned_data(pin_name, refresh=False):
+
+    # Reuse a recent fetch of the same pin unless a refresh is requested
+    cached = pin_cache.get(pin_name)
+    if cached is not None and not refresh and time.monotonic() - cached[0] < PIN_CACHE_SECONDS:
+        return cached[1], cached[2]
     
-    board = board_connect(api_key=os.getenv('POSIT_API_KEY'), server_url=os.getenv('POSIT_SERVER_URL'))
+    board = get_pins_board()
 
     df = board.pin_read(pin_name)
     if 'Open Date' in df.columns:
@@ -56,7 +77,7 @@ def fetch_pinned_data(pin_name):
                 # Fall back to the custom parsing format (YYMMDD)
                 df['Date'] = pd.to_datetime(df['Date'], format='%y%m%d', errors='coerce')
             except Exception as e:
-                print(f"Error converting dates: {e}")
+                logger.warning("Error converting dates: %s", e)
 
     # Replace NaN-values with empty string
     df = df.replace(np.nan, '', regex=True)
@@ -65,22 +86,35 @@ def fetch_pinned_data(pin_name):
     meta_created = board.pin_meta(pin_name).created
 
     # Add html link for limsids
+    for col in ["seq_limsid", "nd_limsid", "qubit_limsid", "prep_limsid"]:
+        if col in df.columns:
+            df[col] = transform_to_html_column(df[col])
 
-    if "seq_limsid" in df.columns:
-        df['seq_limsid'] = df['seq_limsid'].apply(transform_to_html)
+    # Comments are free text from LIMS users, so they are HTML escaped before line breaks are turned into HTML line breaks
+    comment_columns = [col for col in df.columns if 'comment' in col.lower()]
+    for col in comment_columns:
+        df[col] = df[col].map(html.escape).str.replace('\n', '<br>', regex=False)
 
-    if "nd_limsid" in df.columns:
-        df['nd_limsid'] = df['nd_limsid'].apply(transform_to_html)
+    # Store the repetitive columns as categoricals to cut memory and speed up the isin filters
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
 
-    if "qubit_limsid" in df.columns:
-        df['qubit_limsid'] = df['qubit_limsid'].apply(transform_to_html)
-    
-    if "prep_limsid" in df.columns:
-        df['prep_limsid'] = df['prep_limsid'].apply(transform_to_html)
+    # Downcast integer columns (counts, run numbers, cycles) to the smallest integer type that holds their values
+    for col in df.select_dtypes('integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
 
-    # Transform line breaks in comment columns to HTML line breaks
-    comment_columns = [col for col in df.columns if 'comment' in col.lower()]
-    for col in comment_columns:
-        df[col] = df[col].apply(transform_comments_to_html)
+    pin_cache[pin_name] = (time.monotonic(), df, meta_created)
 
     return df, meta_created
+
+
+def fetch_pinned_data_as_completed(pin_names, refresh=False):
+
+    # Reading a pin is mostly waiting on the Posit Connect server, so the pins are fetched in parallel threads
+    # Yields (pin name, (dataframe, created date)) for each pin as soon as its fetch has finished
+    get_pins_board()  # Connect once up front so the threads share the same board
+    with ThreadPoolExecutor(max_workers=len(pin_names)) as executor:
+        futures = {executor.submit(fetch_pinned_data, pin_name, refresh): pin_name for pin_name in pin_names}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
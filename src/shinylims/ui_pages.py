@@ -2,7 +2,7 @@
 Module containing ui page definitions for the Clarity LIMS Shiny App
 '''
 
-from shiny import App, render, ui, req, reactive
+from shiny import ui
 from faicons import icon_svg
 
 
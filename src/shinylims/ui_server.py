@@ -1,10 +1,69 @@
-import seaborn as sns   # will be used for some plots on the Sequencing Runs page
 from shiny import  render, ui, reactive
 from itables.shiny import DT
 import pandas as pd
+import numpy as np
 import datetime
 import pytz
 from itables.javascript import JavascriptFunction
+from collections import OrderedDict
+
+#####################
+# STATIC DT OPTIONS #
+#####################
+
+# Option values that do not depend on user input are built once at import instead of on every render
+
+# Rounds numbers for display while keeping the raw value for sorting and filtering
+ROUND_NUMBER_RENDER = JavascriptFunction("function(data, type, row) { return type === 'display' ? Math.round(data).toString() : data; }")
+
+# Copy and export buttons, with a page length button in front for the paged tables
+COPY_EXPORT_BUTTONS = ["copyHtml5",
+                       {"extend": "csvHtml5", "title": "WGS Sample Data"},
+                       {"extend": "excelHtml5", "title": "WGS Sample Data"},]
+EXPORT_BUTTONS = ["pageLength"] + COPY_EXPORT_BUTTONS
+
+LENGTH_MENU = [[50, 100, 200, 500, -1], [50, 100, 200, 500, "All (NB: Slow)" ]]
+PROJECTS_TABLE_CLASSES = "compact hover order-column cell-border"
+
+WGS_LENGTH_MENU = [[200, 500, 1000, 2000, -1], [200, 500, 1000, "2000 (NB: Slow)", "All (NB: Slow)" ]]
+NOWRAP_TABLE_CLASSES = "nowrap compact hover order-column cell-border"
+
+# Centered cells, optionally with a default width for all columns
+CENTERED_COLUMN_DEFS = [{"className": "dt-center", "targets": "_all"}]
+CENTERED_FIXED_WIDTH_COLUMN_DEFS = CENTERED_COLUMN_DEFS + [{"width": "200px", "targets": "_all"}]
+
+# Historical sequencing runs have a row selection checkbox in the first column
+SEQ_HISTORICAL_COLUMN_DEFS = [{'targets': 0, 'checkboxes': {'selectRow': True}}] + CENTERED_FIXED_WIDTH_COLUMN_DEFS
+
+# Columns hidden by the "All (-IDs,Labels & billinginfo)" preset on the WGS samples page
+WGS_HIDDEN_COLUMNS = frozenset(["Reagent Label", "nd_limsid", "qubit_limsid", "prep_limsid", "seq_limsid", "billed_limsid", "Increased Pooling (%)", "Billing Description", "Price"])
+
+# Columns shown by the "Billing info only" preset on the WGS samples page
+WGS_BILLING_COLUMNS = ["Received Date", "LIMSID", "Name", "billed_limsid", "Invoice ID"]
+
+
+###############
+# TABLE CACHE #
+###############
+
+# Rendered DT tables are shared between sessions. The keys contain the pin timestamp, so new pin data gives new entries
+TABLE_HTML_CACHE_SIZE = 16
+table_html_cache = OrderedDict()
+
+
+def cached_table_html(key, build_table):
+
+    # Return the cached html for key, only calling build_table() when it is not cached yet
+    if key in table_html_cache:
+        table_html_cache.move_to_end(key)
+        return table_html_cache[key]
+
+    html = build_table()
+    table_html_cache[key] = html
+    if len(table_html_cache) > TABLE_HTML_CACHE_SIZE:
+        table_html_cache.popitem(last=False)
+    return html
+
 
 ####################
 # SERVER FUNCTIONS #
@@ -13,56 +72,72 @@ from itables.javascript import JavascriptFunction
 
 def setup_projects_page(input, output, session, projects_df, project_date_created):
 
-    # Define a reactive value to store the filtered dataframe
-    projects_filtered_data = reactive.Value(projects_df)
+    # Sort once on Open Date (missing dates first) so the date filter can use binary search
+    projects_df = projects_df.sort_values('Open Date', na_position='first').reset_index(drop=True)
+    open_dates = projects_df['Open Date'].to_numpy()
+    missing_open_dates = int(projects_df['Open Date'].isna().sum())
+    has_comment = (projects_df['Comment'] != '').to_numpy()
 
-    @render.ui
-    def data_projects():
-        # Filter data using selected date range filter
+    # The info text only depends on the pin timestamp, so it is built once per data load
+    projects_info_text = f"<h3>Data in table is collected from pinned data generated by this script</h3> \
+        <a href='https://github.com/NorwegianVeterinaryInstitute/nvi_lims_epps/blob/main/shiny_app/shiny_sample_table_projects.py'>shiny_sample_table_projects.py (link)</a> <br> \
+        <h3>Data fields collection </h3> \
+        <p>All fields in this table is collected from submitted sample UDFs directly except for the project sample number which is retrieved using a genologics function</p> \
+        <h3>Last pinned data update</h3><br>\
+        {(datetime.datetime.fromisoformat(project_date_created).astimezone(pytz.timezone('Europe/Berlin'))).strftime('%Y-%m-%d (kl %H:%M)')}"
 
+    # Filtered projects only depend on the filter inputs, so changing the column selection does not refilter
+    @reactive.Calc
+    def projects_filtered_data():
+        # Filter data using selected date range filter. Projects without open date are always kept,
+        # the dated projects within the range are found as one contiguous slice of the sorted dates
         start_date, end_date = input.date_range_projects()
-        filtered_df = projects_df[
-            (projects_df['Open Date'].isna()) |
-            (projects_df['Open Date'] >= pd.to_datetime(start_date)) &
-            (projects_df['Open Date'] <= pd.to_datetime(end_date))]
+        dated = open_dates[missing_open_dates:]
+        first = missing_open_dates + np.searchsorted(dated, np.datetime64(start_date), side='left')
+        last = missing_open_dates + np.searchsorted(dated, np.datetime64(end_date), side='right')
+        rows = np.r_[0:missing_open_dates, first:last]
         
         # Filter data using the "show projects with comment only"-button
         project_comment_filter = input.project_comment_filter()
         if project_comment_filter == True:
-            filtered_df = filtered_df[filtered_df['Comment'] != '']
+            rows = rows[has_comment[rows]]
 
-        # Pandas will insert indexing, which we dont want
-        dat = filtered_df.reset_index(drop=True)
+        # Both filters are combined into one set of row positions, so the table is only sliced once
+        return projects_df.iloc[rows]
 
-        # Store selected columns in variable and set the filtered df in reactive value 
+    @render.ui
+    def data_projects():
+        # Store selected columns in variable and get the filtered df from the reactive calculation
         selected_columns =  list(input.fields_to_display_projects())
-        projects_filtered_data.set(filtered_df)
+        filtered_df = projects_filtered_data()
+
+        # Pandas will insert indexing, which we dont want (left out with showIndex=False below)
+        dat = filtered_df[selected_columns]
         
         #get index for the comment section (used for css styling in DT below)
-        if 'Comment' in dat[selected_columns].columns:
-            comment_index = dat[selected_columns].columns.get_loc('Comment')
+        if 'Comment' in dat.columns:
+            comment_index = dat.columns.get_loc('Comment')
         else:
             comment_index = "Dummy"
 
         # Return HTML tag with DT table element
-        return ui.HTML(DT(dat[selected_columns], 
+        return ui.HTML(DT(dat, 
+                          showIndex=False,
                           layout={"topEnd": "search"}, 
                           column_filters="footer", 
                           search={"smart": True},
-                          lengthMenu=[[50, 100, 200, 500, -1], [50, 100, 200, 500, "All (NB: Slow)" ]], 
-                          classes="compact hover order-column cell-border", 
+                          lengthMenu=LENGTH_MENU, 
+                          classes=PROJECTS_TABLE_CLASSES, 
                           #scrollY=True,
                           scrollY = "750px",
                           #scrollCollapse=True,
                           paging=True,
                           #scrollX = True,
+                          deferRender=True,
                           maxBytes=0, 
                           autoWidth=True,
                           keys= True,
-                          buttons=["pageLength", 
-                                   "copyHtml5",
-                                  {"extend": "csvHtml5", "title": "WGS Sample Data"},
-                                  {"extend": "excelHtml5", "title": "WGS Sample Data"},],
+                          buttons=EXPORT_BUTTONS,
                           order=[[0, "desc"]],
                           columnDefs=[{'targets': comment_index, 'className': 'left-column'},{"className": "dt-center", "targets": "_all"}],))
 
@@ -109,7 +184,6 @@ def setup_projects_page(input, output, session, projects_df, project_date_create
 
         total_entries = len(projects_df)
         filtered_entries = len(projects_filtered_data())
-        filtered_out = total_entries - filtered_entries
         
         if num_filters > 0:
             return f'Filters ({num_filters} filters applied, {filtered_entries} of {total_entries} projects)'
@@ -126,14 +200,7 @@ def setup_projects_page(input, output, session, projects_df, project_date_create
     
     @render.ui
     def projects_info():
-        text = f"<h3>Data in table is collected from pinned data generated by this script</h3> \
-        <a href='https://github.com/NorwegianVeterinaryInstitute/nvi_lims_epps/blob/main/shiny_app/shiny_sample_table_projects.py'>shiny_sample_table_projects.py (link)</a> <br> \
-        <h3>Data fields collection </h3> \
-        <p>All fields in this table is collected from submitted sample UDFs directly except for the project sample number which is retrieved using a genologics function</p> \
-        <h3>Last pinned data update</h3><br>\
-        {(datetime.datetime.fromisoformat(project_date_created).astimezone(pytz.timezone('Europe/Berlin'))).strftime('%Y-%m-%d (kl %H:%M)')}"
-        
-        return ui.HTML(text)
+        return ui.HTML(projects_info_text)
     
 def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  historical_df):
     
@@ -141,110 +208,136 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
     filtered_data = reactive.Value(wgs_df)
     filtered_data_historical = reactive.Value(historical_df)
 
+    # The filter choices and the first received date only depend on the pinned data, so they are computed once
+    unique_project_accounts = wgs_df['Project Account'].cat.categories.tolist()  # Categories are already sorted
+    unique_experiment_names = wgs_df['Experiment Name'].unique().tolist()
+    unique_progress = wgs_df['Progress'].unique().tolist()
+    first_received_date = wgs_df['Received Date'].min().date()
+
+    # The date filter compares directly against the datetime64 values of the received dates
+    received_dates = wgs_df['Received Date'].to_numpy()
+
+    # The historical running numbers are cast to integers once instead of twice on every slider change
+    historical_running_numbers = historical_df['Løpende nr'].astype(int).to_numpy()
+
     # Populate the selectize field for project account filter
     @reactive.Effect
     def update_project_account_choices():
-        unique_project_accounts = sorted(wgs_df['Project Account'].unique().tolist())
         ui.update_selectize("filter_project_account", choices=unique_project_accounts)
 
     # Populate the selectize field for Experiment Name filter
     @reactive.Effect
     def update_experiment_name_choices():
-        unique_experiment_names = wgs_df['Experiment Name'].unique().tolist()
         ui.update_selectize("filter_experiment_name", choices=unique_experiment_names)
     
     # Populate the selectize filed for Progress filter
     @reactive.Effect
     def update_progress_choices():
-        unique_progress = wgs_df['Progress'].unique().tolist()
         ui.update_selectize("filter_progress", choices=unique_progress)
 
-    def get_selected_columns(preset, custom_columns, all_columns):
+    # The preset column lists only depend on the pinned columns, so they are built once
+    wgs_columns = wgs_df.columns.tolist()
+    wgs_default_columns = [col for col in wgs_columns if col not in WGS_HIDDEN_COLUMNS]
+    # Billing columns missing from the pin are left out, so the preset never selects an unknown column
+    wgs_billing_columns = [col for col in WGS_BILLING_COLUMNS if col in wgs_df.columns]
+
+    # Sets of the same presets, used to recognise a preset when the checkboxes are changed by hand
+    preset_all = frozenset(wgs_columns)
+    preset_no_ids_labels_billing = frozenset(wgs_default_columns)
+    preset_billing_info_only = frozenset(wgs_billing_columns)
+
+    def get_selected_columns(preset, custom_columns):
             if preset == "All":
-                return all_columns
+                return wgs_columns
             elif preset == "All (-IDs,Labels & billinginfo)":
-                return [col for col in all_columns if col not in ["Reagent Label", "nd_limsid", "qubit_limsid", "prep_limsid", "seq_limsid", "billed_limsid", "Increased Pooling (%)", "Billing Description", "Price"]]
+                return wgs_default_columns
             elif preset == "Billing info only":
-                return ["Received Date", "LIMSID", "Name", "billed_limsid", "Invoice ID"]
+                return wgs_billing_columns
             elif preset == "Custom":
                 return custom_columns
             return []
 
+    # The displayed columns only depend on the preset and the checkboxes, not on the row filters
+    @reactive.Calc
+    def wgs_selected_columns():
+        return get_selected_columns(input.presets(), list(input.fields_to_display()))
+
     # Filter and render the filtered dataframe
     @render.ui
     def data_wgs():
         
         # Filter data using selected date range filter
         start_date, end_date = input.date_range()
-        filtered_df = wgs_df[
-            (wgs_df['Received Date'].isna()) | 
-            ((wgs_df['Received Date'] >= pd.to_datetime(start_date)) & 
-            (wgs_df['Received Date'] <= pd.to_datetime(end_date)))
-            ]
+        mask = np.isnat(received_dates) | ((received_dates >= np.datetime64(start_date)) & (received_dates <= np.datetime64(end_date)))
+
+        # The other filters are combined into the same mask, so the dataframe is only sliced once
         selected_project_accounts = input.filter_project_account()
         if selected_project_accounts:
-            filtered_df = filtered_df[filtered_df['Project Account'].isin(selected_project_accounts)]
+            mask &= wgs_df['Project Account'].isin(selected_project_accounts).to_numpy()
         
         selected_experiment_names = input.filter_experiment_name()
         if selected_experiment_names:
-            filtered_df = filtered_df[filtered_df['Experiment Name'].isin(selected_experiment_names)]
+            mask &= wgs_df['Experiment Name'].isin(selected_experiment_names).to_numpy()
 
         selected_progress = input.filter_progress()
         if selected_progress:
-            filtered_df = filtered_df[filtered_df['Progress'].isin(selected_progress)]
+            mask &= wgs_df['Progress'].isin(selected_progress).to_numpy()
 
-        # Pandas will insert indexing, which we dont want
-        dat = filtered_df.reset_index(drop=True)
+        filtered_df = wgs_df[mask]
 
         # Store selected columns in variable and set the filtered df in reactive value
-        selected_columns = get_selected_columns(input.presets(), list(input.fields_to_display()), wgs_df.columns.tolist())
+        selected_columns = wgs_selected_columns()
         filtered_data.set(filtered_df)
-        
+
+        # The table only depends on the pin version and the inputs used above, so equal requests share the html
+        table_key = ("wgs", wgs_date_created, start_date, end_date, selected_project_accounts,
+                     selected_experiment_names, selected_progress, tuple(selected_columns))
+
+        def build_table():
+            # Pandas will insert indexing, which we dont want
+            return DT(filtered_df[selected_columns], 
+                      showIndex=False,
+                      layout={"topEnd": "search"},
+                      lengthMenu=WGS_LENGTH_MENU, 
+                      column_filters="footer", 
+                      search={"smart": True},
+                      classes=NOWRAP_TABLE_CLASSES, 
+                      scrollY = "750px",
+                      #scrollX=True,
+                      #scrollCollapse=True,
+                      paging=True,
+                      autoWidth = True,
+                      deferRender=True,
+                      maxBytes=0, 
+                      keys= True,
+                      buttons=EXPORT_BUTTONS,
+                      order=[[0, "desc"]],
+                      columnDefs=CENTERED_FIXED_WIDTH_COLUMN_DEFS
+                      )
+
         # Return HTML tag with DT table element
-        return ui.HTML(DT(dat[selected_columns], 
-                          layout={"topEnd": "search"},
-                          lengthMenu=[[200, 500, 1000, 2000, -1], [200, 500, 1000, "2000 (NB: Slow)", "All (NB: Slow)" ]], 
-                          column_filters="footer", 
-                          search={"smart": True},
-                          classes="nowrap compact hover order-column cell-border", 
-                          scrollY = "750px",
-                          #scrollX=True,
-                          #scrollCollapse=True,
-                          paging=True,
-                          autoWidth = True,
-                          maxBytes=0, 
-                          keys= True,
-                          buttons=["pageLength", 
-                                   "copyHtml5",
-                                  {"extend": "csvHtml5", "title": "WGS Sample Data"},
-                                  {"extend": "excelHtml5", "title": "WGS Sample Data"},],
-                          order=[[0, "desc"]],
-                          columnDefs=[
-                          {"className": "dt-center", "targets": "_all"},
-                          {"width": "200px", "targets": "_all"}]  # Set a default width for all columns
-                          )) 
+        return ui.HTML(cached_table_html(table_key, build_table))
 
     @render.ui
     def historical_wgs():
         
         # Filter data using range filter
         min, max = input.slider_historical()
-        filtered_df = historical_df[(historical_df['Løpende nr'].astype(int) >= min) & (historical_df['Løpende nr'].astype(int) <= max)]
-        # Pandas will insert indexing, which we dont want
-        dat = filtered_df.reset_index(drop=True)
+        filtered_df = historical_df[(historical_running_numbers >= min) & (historical_running_numbers <= max)]
         
         # Store selected columns in variable and set the filtered df in reactive value
         selected_columns = list(input.fields_to_display_historical())
         filtered_data_historical.set(filtered_df)
         
-        # Return HTML tag with DT table element
+        # Return HTML tag with DT table element (pandas will insert indexing, which we dont want)
         
-        return ui.HTML(DT(dat[selected_columns], 
+        return ui.HTML(DT(filtered_df[selected_columns], 
+                          showIndex=False,
                           layout={"topEnd": "search"},
-                          lengthMenu=[[50, 100, 200, 500, -1], [50, 100, 200, 500, "All (NB: Slow)" ]],
+                          lengthMenu=LENGTH_MENU,
                           column_filters="footer", 
                           search={"smart": True},
-                          classes="nowrap compact hover order-column cell-border", 
+                          classes=NOWRAP_TABLE_CLASSES, 
                           scrollY = "750px",
                           #scrollX=True,
                           #scrollCollapse=True,
@@ -253,13 +346,8 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
                           deferRender=True,  
                           keys= True,
                           maxBytes=0, 
-                          buttons=["pageLength", 
-                                   "copyHtml5",
-                                  {"extend": "csvHtml5", "title": "WGS Sample Data"},
-                                  {"extend": "excelHtml5", "title": "WGS Sample Data"},],
-                          columnDefs=[
-                          {"className": "dt-center", "targets": "_all"},
-                          {"width": "200px", "targets": "_all"}]  # Set a default width for all columns
+                          buttons=EXPORT_BUTTONS,
+                          columnDefs=CENTERED_FIXED_WIDTH_COLUMN_DEFS
         ))
 
     # Define default column checkbox selection
@@ -267,8 +355,8 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
     def set_default_fields_to_display():
         ui.update_checkbox_group(
             "fields_to_display",
-            choices= wgs_df.columns.tolist(),
-            selected= [x for x in wgs_df.columns.tolist() if x not in ["Reagent Label", "nd_limsid", "qubit_limsid", "prep_limsid", "seq_limsid", "billed_limsid", "Increased Pooling (%)", "Billing Description", "Price"]]
+            choices= wgs_columns,
+            selected= wgs_default_columns
         )
     
     @reactive.Effect
@@ -291,11 +379,7 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
     @reactive.Effect
     @reactive.event(input.fields_to_display)
     def switch_to_custom_preset():
-        current_selected_fields = set(input.fields_to_display())
-        all_fields = set(wgs_df.columns.tolist())
-        preset_all = all_fields
-        preset_no_ids_labels_billing = {x for x in wgs_df.columns if x not in ["Reagent Label", "nd_limsid", "qubit_limsid", "prep_limsid", "seq_limsid", "billed_limsid", "Increased Pooling (%)", "Billing Description", "Price"]}
-        preset_billing_info_only = {"Received Date", "LIMSID", "Name", "billed_limsid", "Invoice ID"}
+        current_selected_fields = frozenset(input.fields_to_display())
 
         if current_selected_fields == preset_all:
             ui.update_radio_buttons("presets", selected="All")
@@ -311,7 +395,7 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
     @reactive.event(input.presets)
     def update_fields_to_display():
         selected_preset = input.presets()
-        selected_columns = get_selected_columns(selected_preset, list(input.fields_to_display()), wgs_df.columns.tolist())
+        selected_columns = get_selected_columns(selected_preset, list(input.fields_to_display()))
         ui.update_checkbox_group("fields_to_display", selected=selected_columns)
     
     # Set default date range when the app starts
@@ -319,7 +403,7 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
     def set_default_date_range():
         ui.update_date_range(
             "date_range",
-            start=pd.to_datetime(wgs_df['Received Date']).min().date(),
+            start=first_received_date,
             end=datetime.date.today()
         )
     
@@ -329,7 +413,7 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
     def reset_date_range():
         ui.update_date_range(
             "date_range",
-            start=pd.to_datetime(wgs_df['Received Date']).min().date(),
+            start=first_received_date,
             end=datetime.date.today()
         )
 
@@ -341,19 +425,11 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
         experiment_name = input.filter_experiment_name()
         progress = input.filter_progress()
 
-        num_filters = 0
-        if start_date != pd.to_datetime(wgs_df['Received Date']).min().date() or end_date != datetime.date.today():
-            num_filters += 1
-        if project_account:
-            num_filters += 1
-        if experiment_name:
-            num_filters += 1
-        if progress:
-            num_filters += 1
+        date_filtered = start_date != first_received_date or end_date != datetime.date.today()
+        num_filters = sum(map(bool, (date_filtered, project_account, experiment_name, progress)))
 
         total_entries = len(wgs_df)
         filtered_entries = len(filtered_data())
-        filtered_out = total_entries - filtered_entries
         
         if num_filters > 0:
             return f'Filters ({num_filters} filters applied, {filtered_entries} of {total_entries} samples)'
@@ -393,9 +469,8 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
         num_selected = len(selected_columns)
         return f"Column Selection ({num_selected} of {total_columns} columns selected)"
 
-    @render.ui
-    def wgs_info():
-        text = f"<h3>Data in table is collected from pinned data generated by this script</h3> \
+    # The info text only depends on the pin timestamp, so it is built once per data load
+    wgs_info_text = f"<h3>Data in table is collected from pinned data generated by this script</h3> \
         <a href='https://github.com/NorwegianVeterinaryInstitute/nvi_lims_epps/blob/main/shiny_app/shiny_sample_table_WGS.py'>shiny_sample_table_WGS.py (link)</a> <br> \
         <h3>Data fields are collected from the following LIMS steps</h3> <br> \
         <p><strong>Extraction step</strong>: Extraction Number</p> \
@@ -407,18 +482,23 @@ def setup_wgs_samples_page(input, output, session, wgs_df, wgs_date_created,  hi
         {(datetime.datetime.fromisoformat(wgs_date_created).astimezone(pytz.timezone('Europe/Berlin'))).strftime('%Y-%m-%d (kl %H:%M)')} \
         "
 
-        return ui.HTML(text)
+    @render.ui
+    def wgs_info():
+        return ui.HTML(wgs_info_text)
 
 
 def setup_prepared_samples_page(input, output, session, prepared_df, prepared_date_created):
     
     # Define a reactive value to store the filtered dataframe
     prepared_filtered_data = reactive.Value(prepared_df)
+
+    # The first received date is used by the default and reset date ranges and the filter title, so it is found once
+    first_received_date = prepared_df['Received Date'].min().date()
     
     # Populate the selectize field for project account filter
     @reactive.Effect
     def update_project_account_choices_prepared():
-        unique_project_accounts = sorted(prepared_df['Project Account'].unique().tolist())
+        unique_project_accounts = prepared_df['Project Account'].cat.categories.tolist()  # Categories are already sorted
         ui.update_selectize("filter_project_account_prepared", choices=unique_project_accounts)
 
     # Populate the selectize field for Experiment Name filter
@@ -457,34 +537,33 @@ def setup_prepared_samples_page(input, output, session, prepared_df, prepared_da
 
         selected_columns = list(input.fields_to_display_prepared())
 
-        dat = filtered_df.reset_index(drop=True)
         prepared_filtered_data.set(filtered_df)
         
-        return ui.HTML(DT(dat[selected_columns], 
+        # Pandas will insert indexing, which we dont want
+        return ui.HTML(DT(filtered_df[selected_columns], 
+                          showIndex=False,
                           layout={"topEnd": "search"}, 
-                          lengthMenu=[[50, 100, 200, 500, -1], [50, 100, 200, 500, "All (NB: Slow)" ]], 
+                          lengthMenu=LENGTH_MENU, 
                           column_filters="footer", 
                           search={"smart": True},
-                          classes="nowrap compact hover order-column cell-border", 
+                          classes=NOWRAP_TABLE_CLASSES, 
                           scrollY = "750px",
                           #scrollCollapse=True,
                           paging=True,
+                          deferRender=True,
                           maxBytes=0, 
                           autoWidth=True,
                           keys= True,
-                          buttons=["pageLength", 
-                                    "copyHtml5",
-                                  {"extend": "csvHtml5", "title": "WGS Sample Data"},
-                                  {"extend": "excelHtml5", "title": "WGS Sample Data"},],
+                          buttons=EXPORT_BUTTONS,
                           order=[[0, "desc"]],
-                          columnDefs=[{"className": "dt-center", "targets": "_all"}]))
+                          columnDefs=CENTERED_COLUMN_DEFS))
     
     # Define default date range (filter)
     @reactive.Effect
     def set_default_date_range_prepared():
         ui.update_date_range(
             "date_range_prepared",
-            start=pd.to_datetime(prepared_df['Received Date']).min().date(),
+            start=first_received_date,
             end=datetime.date.today()
         )
 
@@ -503,7 +582,7 @@ def setup_prepared_samples_page(input, output, session, prepared_df, prepared_da
     def reset_date_range_prepared():
         ui.update_date_range(
             "date_range_prepared",
-            start=pd.to_datetime(prepared_df['Received Date']).min().date(),
+            start=first_received_date,
             end=datetime.date.today()
         )
 
@@ -515,19 +594,11 @@ def setup_prepared_samples_page(input, output, session, prepared_df, prepared_da
         experiment_name = input.filter_experiment_name_prepared()
         progress = input.filter_progress_prepared()
 
-        num_filters = 0
-        if start_date != pd.to_datetime(prepared_df['Received Date']).min().date() or end_date != datetime.date.today():
-            num_filters += 1
-        if project_account:
-            num_filters += 1
-        if experiment_name:
-            num_filters += 1
-        if progress:
-            num_filters += 1
+        date_filtered = start_date != first_received_date or end_date != datetime.date.today()
+        num_filters = sum(map(bool, (date_filtered, project_account, experiment_name, progress)))
 
         total_entries = len(prepared_df)
         filtered_entries = len(prepared_filtered_data())
-        filtered_out = total_entries - filtered_entries
         
         if num_filters > 0:
             return f'Filters ({num_filters} filters applied, {filtered_entries} of {total_entries} samples)'
@@ -542,9 +613,8 @@ def setup_prepared_samples_page(input, output, session, prepared_df, prepared_da
         num_selected = len(selected_columns)
         return f"Column Selection ({num_selected} of {total_columns} columns selected)"
     
-    @render.ui
-    def prepared_info():
-        text = f"<h3>Data in table is collected from pinned data generated by this script</h3> \
+    # The info text only depends on the pin timestamp, so it is built once per data load
+    prepared_info_text = f"<h3>Data in table is collected from pinned data generated by this script</h3> \
         <a href='https://github.com/NorwegianVeterinaryInstitute/nvi_lims_epps/blob/main/shiny_app/shiny_sample_table_prepared.py'>shiny_sample_table_prepared.py (link)</a> <br> \
         <h3>Data fields collection </h3> \
         <p>As a first step to create this table, the script will filter out sample objects with Sample Types ['Prepared Pool', 'Prepared Libraries']. Then data is found from the following LIMS-steps:</p> \
@@ -553,83 +623,90 @@ def setup_prepared_samples_page(input, output, session, prepared_df, prepared_da
         (NB: Since all information except billing is collected from the submitted sample level, only the most recent Experiment Name and Reagent Label is shown.)\
         <h3>Last pinned data update</h3><br>\
         {(datetime.datetime.fromisoformat(prepared_date_created).astimezone(pytz.timezone('Europe/Berlin'))).strftime('%Y-%m-%d (kl %H:%M)')}"
-        
-        return ui.HTML(text)
+
+    @render.ui
+    def prepared_info():
+        return ui.HTML(prepared_info_text)
 
 def setup_seq_run_page(input, output, session, seq_df, seq_date_created, historical_seq_df):
     
     # Define a reactive value to store the filtered dataframe
     seq_filtered_data = reactive.Value(seq_df)
+
+    # The first run date is used by the default and reset date ranges and the filter title, so it is found once
+    first_run_date = seq_df['Date'].min().date()
     
+    # The filter choices only depend on the pinned data, so they are computed once
+    unique_read_lengths = sorted(seq_df['Read Length'].unique().tolist())
+    unique_cassette_types = seq_df['Casette Type'].unique().tolist()
+
+    # The date filter compares directly against the datetime64 values of the run dates
+    run_dates = seq_df['Date'].to_numpy()
+
     # Populate the selectize field for project account filter
     @reactive.Effect
     def update_project_account_choices_seq():
-        unique_project_accounts = sorted(seq_df['Read Length'].unique().tolist())
-        ui.update_selectize("filter_reads_seq", choices=unique_project_accounts)
+        ui.update_selectize("filter_reads_seq", choices=unique_read_lengths)
 
     
     # Populate the selectize field for Progress filter
     @reactive.Effect
     def update_cassette_choices_seq():
-        unique_progress = seq_df['Casette Type'].unique().tolist()
-        ui.update_selectize("filter_cassette_seq", choices=unique_progress)
+        ui.update_selectize("filter_cassette_seq", choices=unique_cassette_types)
 
     # Return HTML tag with DT table element
     @render.ui
     def data_seq():
 
         start_date, end_date = input.date_range_seq()
-        filtered_df = seq_df[(seq_df['Date'] >= pd.to_datetime(start_date)) & (seq_df['Date'] <= pd.to_datetime(end_date))]
-                
+        mask = (run_dates >= np.datetime64(start_date)) & (run_dates <= np.datetime64(end_date))
+
+        # The other filters are combined into the same mask, so the dataframe is only sliced once
         selected_casette_type = input.filter_cassette_seq()
-        
         if selected_casette_type:
-            filtered_df = filtered_df[filtered_df['Casette Type'].isin(selected_casette_type)]
+            mask &= seq_df['Casette Type'].isin(selected_casette_type).to_numpy()
         
         selected_filter_reads_seq = input.filter_reads_seq()
         if selected_filter_reads_seq:
-            filtered_df = filtered_df[filtered_df['Read Length'].isin(selected_filter_reads_seq)]
+            mask &= seq_df['Read Length'].isin(selected_filter_reads_seq).to_numpy()
+
+        filtered_df = seq_df[mask]
 
         selected_columns = list(input.fields_to_display_seq())
-        dat = filtered_df.reset_index(drop=True)
         seq_filtered_data.set(filtered_df)
-        
-        if 'Comment' in dat[selected_columns].columns:
-            comment_index = dat[selected_columns].columns.get_loc('Comment')
-        else:
-            comment_index = "Dummy"
 
-        if 'Run Number' in dat[selected_columns].columns:
-            run_number_index = dat[selected_columns].columns.get_loc('Run Number')
-        else:
-            run_number_index = "Dummy"
+        # The table only depends on the pin version and the inputs used above, so equal requests share the html
+        table_key = ("seq", seq_date_created, start_date, end_date, selected_casette_type,
+                     selected_filter_reads_seq, tuple(selected_columns))
+
+        def build_table():
+            # Get the table index of the columns with their own styling in one lookup ("Dummy" when not selected)
+            comment_index, run_number_index, cluster_density_index = (
+                int(index) if index != -1 else "Dummy"
+                for index in pd.Index(selected_columns).get_indexer(['Comment', 'Run Number', 'Cluster density (K/mm2)']))
+
+            # Pandas will insert indexing, which we dont want
+            return DT(filtered_df[selected_columns], 
+                      showIndex=False,
+                      layout={"topEnd": "search"}, 
+                      column_filters="footer", 
+                      search={"smart": True},
+                      classes=NOWRAP_TABLE_CLASSES,  
+                      scrollY = "750px",
+                      paging=False,
+                      maxBytes=0, 
+                      autoWidth=True,
+                      keys= True,
+                      buttons=COPY_EXPORT_BUTTONS,
+                      order=[[0, "desc"]],
+                      columnDefs=[
+                          {'targets': comment_index, 'className': 'left-column'},
+                          {"className": "dt-center", "targets": "_all"},
+                          {"targets": run_number_index, "render": ROUND_NUMBER_RENDER},
+                          {"targets": cluster_density_index, "render": ROUND_NUMBER_RENDER}
+                          ])
 
-        if 'Cluster density (K/mm2)' in dat[selected_columns].columns:
-            cluster_density_index = dat[selected_columns].columns.get_loc('Cluster density (K/mm2)')
-        else:
-            cluster_density_index = "Dummy"
-        
-
-        return ui.HTML(DT(dat[selected_columns], 
-                          layout={"topEnd": "search"}, 
-                          column_filters="footer", 
-                          search={"smart": True},
-                          classes="compact nowrap hover order-column cell-border",  
-                          scrollY = "750px",
-                          paging=False,
-                          maxBytes=0, 
-                          autoWidth=True,
-                          keys= True,
-                          buttons=["copyHtml5",
-                                  {"extend": "csvHtml5", "title": "WGS Sample Data"},
-                                  {"extend": "excelHtml5", "title": "WGS Sample Data"},],
-                          order=[[0, "desc"]],
-                          columnDefs=[
-                              {'targets': comment_index, 'className': 'left-column'},
-                              {"className": "dt-center", "targets": "_all"},
-                              {"targets": run_number_index, "render": JavascriptFunction("function(data, type, row) { return type === 'display' ? Math.round(data).toString() : data; }")},
-                              {"targets": cluster_density_index, "render": JavascriptFunction("function(data, type, row) { return type === 'display' ? Math.round(data).toString() : data; }")}
-                              ]))
+        return ui.HTML(cached_table_html(table_key, build_table))
 
     @render.ui
     def SeqHistorical():
@@ -643,7 +720,7 @@ def setup_seq_run_page(input, output, session, seq_df, seq_date_created, histori
                           #lengthMenu=[[50, 100, 200, 500, -1], [50, 100, 200, 500, "All (NB: Slow)" ]],
                           column_filters="footer", 
                           search={"smart": True},
-                          classes="nowrap compact hover order-column cell-border", 
+                          classes=NOWRAP_TABLE_CLASSES, 
                           scrollY = "750px",
                           #scrollX=True,
                           #scrollCollapse=True,
@@ -652,14 +729,9 @@ def setup_seq_run_page(input, output, session, seq_df, seq_date_created, histori
                           deferRender=True,  
                           keys= True,
                           maxBytes=0, 
-                          buttons=[ "copyHtml5",
-                                  {"extend": "csvHtml5", "title": "WGS Sample Data"},
-                                  {"extend": "excelHtml5", "title": "WGS Sample Data"},],
+                          buttons=COPY_EXPORT_BUTTONS,
                           #select = [{'style': 'multi', 'selector': 'td:first-child'}],
-                          columnDefs=[
-                              {'targets': 0, 'checkboxes': {'selectRow': True}},
-                          {"className": "dt-center", "targets": "_all"},
-                          {"width": "200px", "targets": "_all"}]  # Set a default width for all columns
+                          columnDefs=SEQ_HISTORICAL_COLUMN_DEFS
         ))  
 
 
@@ -668,7 +740,7 @@ def setup_seq_run_page(input, output, session, seq_df, seq_date_created, histori
     def set_default_date_range_seq():
         ui.update_date_range(
             "date_range_seq",
-            start=pd.to_datetime(seq_df['Date']).min().date(),
+            start=first_run_date,
             end=datetime.date.today()
         )
 
@@ -695,7 +767,7 @@ def setup_seq_run_page(input, output, session, seq_df, seq_date_created, histori
     def reset_date_range_seq():
         ui.update_date_range(
             "date_range_seq",
-            start=pd.to_datetime(seq_df['Date']).min().date(),
+            start=first_run_date,
             end=datetime.date.today()
         )
 
@@ -707,7 +779,7 @@ def setup_seq_run_page(input, output, session, seq_df, seq_date_created, histori
         reads = input.filter_reads_seq()
 
         num_filters = 0
-        if start_date != pd.to_datetime(seq_df['Date']).min().date() or end_date != datetime.date.today():
+        if start_date != first_run_date or end_date != datetime.date.today():
             num_filters += 1
         if casette:
             num_filters += 1
@@ -751,9 +823,8 @@ def setup_seq_run_page(input, output, session, seq_df, seq_date_created, histori
         num_selected = len(selected_columns)
         return f"Column Selection ({num_selected} of {total_columns} columns selected)"
     
-    @render.ui
-    def seqRun_info():
-        text = f"<h3>Data in table is collected from pinned data generated by this script</h3> \
+    # The info text only depends on the pin timestamp, so it is built once per data load
+    seq_run_info_text = f"<h3>Data in table is collected from pinned data generated by this script</h3> \
         <a href='https://github.com/NorwegianVeterinaryInstitute/nvi_lims_epps/blob/main/shiny_app/shiny_sequencing_runs.py'>shiny_sequencing_runs.py (link)</a> <br> \
         <h3>Data fields collection </h3> \
         <p>This table is created by using the sequencing steps as starting point and traversing back to step 7 (Generate SampleSheet) and step 6 (Make Final Loading Dilution) to retrieve data</p> \
@@ -763,5 +834,7 @@ def setup_seq_run_page(input, output, session, seq_df, seq_date_created, histori
         <p>Table will not be updated until the sequencing step has been completed<p>\
         <h3>Last pinned data update</h3><br>\
         {(datetime.datetime.fromisoformat(seq_date_created).astimezone(pytz.timezone('Europe/Berlin'))).strftime('%Y-%m-%d (kl %H:%M)')}"
-        
-        return ui.HTML(text)
\ No newline at end of file
+
+    @render.ui
+    def seqRun_info():
+        return ui.HTML(seq_run_info_text)
\ No newline at end of file